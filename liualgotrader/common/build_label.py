@@ -0,0 +1,43 @@
+"""Resolve the build label shown by the trader & tools on startup"""
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+VERSION_FILE = PACKAGE_DIR / "VERSION"
+
+
+def describe_repo(path: str = "../") -> str:
+    """git describe of the source repository, may raise on failure"""
+    import pygit2
+
+    return pygit2.Repository(path).describe(
+        describe_strategy=pygit2.GIT_DESCRIBE_TAGS
+    )
+
+
+def get_build_label() -> str:
+    """
+    build label. Running from a git checkout (e.g. after pip install -e .)
+    the checkout itself is described, installed packages read the VERSION
+    file written at build time (see setup.py). Falls back to describing
+    the current git repository, and then to the package version.
+    """
+    checkout = PACKAGE_DIR.parent
+    if (checkout / ".git").exists():
+        try:
+            return describe_repo(str(checkout))
+        except Exception:
+            pass
+
+    try:
+        label = VERSION_FILE.read_text().strip()
+        if label:
+            return label
+    except OSError:
+        pass
+
+    try:
+        return describe_repo()
+    except Exception:
+        import liualgotrader
+
+        return getattr(liualgotrader, "__version__", "")
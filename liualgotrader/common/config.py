@@ -45,6 +45,7 @@ finnhub_websocket_limit = 50
 #
 env: str = os.getenv("TRADE", "PAPER")
 dsn: str = os.getenv("DSN", "")
+debug_enabled: bool = os.getenv("LIU_DEBUG", "").lower() in ("1", "true")
 
 prod_base_url = os.getenv("ALPACA_LIVE_BASEURL", "https://api.alpaca.markets")
 prod_api_key_id = os.getenv("APCA_API_KEY_ID")
@@ -77,8 +78,12 @@ num_consumers: int = int(os.getenv("NUM_CONSUMERS", "0"))
 num_consumer_processes_ratio: int
 # polygon parameters
 polygon_seconds_timeout = 60
+# number of Polygon.io web-sockets to spread symbols over,
+# keep at 1 unless the polygon plan allows concurrent connections
+polygon_ws_shards: int = int(os.getenv("POLYGON_WS_SHARDS", "1"))
 
 
 @dataclass
 class polygon:
     MAX_DAYS_TO_LOAD: int = 7
+    MAX_CONCURRENT_LOADS: int = int(os.getenv("POLYGON_CONCURRENT_LOADS", "8"))
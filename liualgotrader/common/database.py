@@ -13,6 +13,8 @@ async def create_db_connection(dsn: str = None) -> None:
         min_size=2,
         max_size=10,
         command_timeout=30,
+        max_inactive_connection_lifetime=300,
+        statement_cache_size=1024,
     )
     tlog("db connection pool initialized")
 
@@ -0,0 +1,37 @@
+"""
+json loads() / dumps() drop-in, backed by orjson when it's installed.
+
+dumps() always returns str, same as json.dumps(), so payloads can be
+sent as websocket text frames / queued as before.
+"""
+import json
+import sys
+from types import ModuleType
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+
+def loads(data: Any, *args, **kwargs) -> Any:
+    if orjson and not args and not kwargs:
+        return orjson.loads(data)
+    return json.loads(data, *args, **kwargs)
+
+
+def dumps(obj: Any, *args, **kwargs) -> str:
+    if orjson and not args and not kwargs:
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:
+            # e.g. non-str keys, or ints beyond 64 bit
+            pass
+    return json.dumps(obj, *args, **kwargs)
+
+
+def patch_module(module: ModuleType) -> None:
+    """have module use this file, instead of stdlib json"""
+    if orjson:
+        setattr(module, "json", sys.modules[__name__])
@@ -1,7 +1,7 @@
 import time
 from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import alpaca_trade_api as tradeapi
 import pandas as pd
@@ -196,6 +196,31 @@ def get_historical_daily_from_polygon_by_range(
     return _minute_history
 
 
+def _load_minute_history_from_polygon(
+    api: tradeapi, symbol: str
+) -> Optional[df]:
+    retry_counter = 5
+    while retry_counter > 0:
+        try:
+            _df = api.polygon.historic_agg_v2(
+                symbol,
+                1,
+                "minute",
+                _from=str(date.today() - timedelta(days=10)),
+                to=str(date.today() + timedelta(days=1)),
+            ).df
+            _df["vwap"] = 0.0
+            _df["average"] = 0.0
+            return _df
+        except (
+            requests.exceptions.HTTPError,
+            requests.exceptions.ConnectionError,
+        ):
+            retry_counter -= 1
+
+    return None
+
+
 def get_historical_data_from_polygon(
     api: tradeapi, symbols: List[str], max_tickers: int
 ) -> Dict[str, df]:
@@ -203,44 +228,38 @@ def get_historical_data_from_polygon(
 
     tlog(f"Loading max {max_tickers} tickers w/ highest volume from Polygon")
     minute_history: Dict[str, df] = {}
-    c = 0
+    pending = list(dict.fromkeys(symbols))
     exclude_symbols = []
     try:
-        for symbol in symbols:
-            if symbol not in minute_history:
-                retry_counter = 5
-                while retry_counter > 0:
-                    try:
-                        if c < max_tickers:
-                            _df = api.polygon.historic_agg_v2(
-                                symbol,
-                                1,
-                                "minute",
-                                _from=str(date.today() - timedelta(days=10)),
-                                to=str(date.today() + timedelta(days=1)),
-                            ).df
-                            _df["vwap"] = 0.0
-                            _df["average"] = 0.0
-
-                            minute_history[symbol] = _df
-                            tlog(
-                                f"loaded {len(minute_history[symbol].index)} agg data points for {symbol} {c+1}/{max_tickers}"
-                            )
-                            c += 1
-                            break
-
+        with ThreadPoolExecutor(
+            max_workers=config.polygon.MAX_CONCURRENT_LOADS
+        ) as executor:
+            # load in waves, so symbols w/ lower volume only replace
+            # failed loads, and at most max_tickers are kept
+            while pending and len(minute_history) < max_tickers:
+                batch = pending[: max_tickers - len(minute_history)]
+                pending = pending[len(batch) :]
+                for symbol, _df in zip(
+                    batch,
+                    executor.map(
+                        lambda symbol: _load_minute_history_from_polygon(
+                            api, symbol
+                        ),
+                        batch,
+                    ),
+                ):
+                    if _df is None:
                         exclude_symbols.append(symbol)
-                        break
-                    except (
-                        requests.exceptions.HTTPError,
-                        requests.exceptions.ConnectionError,
-                    ):
-                        retry_counter -= 1
-                        if retry_counter == 0:
-                            exclude_symbols.append(symbol)
+                        continue
+
+                    minute_history[symbol] = _df
+                    tlog(
+                        f"loaded {len(_df.index)} agg data points for {symbol} {len(minute_history)}/{max_tickers}"
+                    )
     except KeyboardInterrupt:
         tlog("KeyboardInterrupt")
 
+    exclude_symbols += pending
     for x in exclude_symbols:
         symbols.remove(x)
 
@@ -264,12 +283,16 @@ async def calculate_trends(pool: Pool) -> bool:
                 response.status_code == 200
                 and (r := response.json())["status"] == "OK"
             ):
-                for ticker in r["tickers"]:
-                    trading_data.snapshot[ticker.ticker] = TickerSnapshot(
-                        symbol=ticker["ticker"],
-                        volume=ticker["day"]["volume"],
-                        today_change=ticker["todaysChangePerc"],
-                    )
+                trading_data.snapshot.update(
+                    {
+                        ticker["ticker"]: TickerSnapshot(
+                            symbol=ticker["ticker"],
+                            volume=ticker["day"]["volume"],
+                            today_change=ticker["todaysChangePerc"],
+                        )
+                        for ticker in r["tickers"]
+                    }
+                )
 
                 if not trading_data.snapshot:
                     tlog("calculate_trends(): market snapshot not available")
@@ -0,0 +1,184 @@
+"""Fixed capacity minute OHLCV history, stored as a NumPy ring-buffer"""
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame as df
+
+NY = "America/New_York"
+
+# spare slots reserved on top of the loaded history, a full day of minutes
+MINUTES_PER_DAY = 24 * 60
+
+
+class MinuteRing:
+    """
+    Per-symbol minute bars kept as struct-of-arrays. Bars are keyed by the
+    floor-minute epoch (seconds), so per-tick updates are an index lookup
+    and a few in-place scalar writes. Once full, the oldest bar is evicted.
+    Strategies still get a DataFrame, via as_dataframe().
+    """
+
+    __slots__ = (
+        "ts",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "vwap",
+        "average",
+        "head",
+        "size",
+        "idx",
+        "_df",
+    )
+
+    def __init__(self, capacity: int = MINUTES_PER_DAY):
+        """
+        create an empty ring
+        :param capacity: max number of minute bars to hold
+        """
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.open = np.zeros(capacity, dtype=np.float64)
+        self.high = np.zeros(capacity, dtype=np.float64)
+        self.low = np.zeros(capacity, dtype=np.float64)
+        self.close = np.zeros(capacity, dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.float64)
+        self.vwap = np.zeros(capacity, dtype=np.float64)
+        self.average = np.zeros(capacity, dtype=np.float64)
+        self.head: int = 0
+        self.size: int = 0
+        self.idx: Dict[int, int] = {}
+        self._df: Optional[df] = None
+
+    @classmethod
+    def from_dataframe(
+        cls, data: df, spare: int = MINUTES_PER_DAY
+    ) -> "MinuteRing":
+        """
+        load a ring from polygon-style minute data
+        :param data: DataFrame w/ open, high, low, close, volume, vwap
+                     and average columns, and a DatetimeIndex
+        :param spare: slots to keep free for live bars before evicting
+        """
+        count = len(data.index)
+        ring = cls(capacity=count + spare)
+        if not count:
+            return ring
+
+        ring.ts[:count] = (
+            data.index.values.astype("datetime64[s]").astype(np.int64)
+            // 60
+            * 60
+        )
+        for column in (
+            "open",
+            "high",
+            "low",
+            "close",
+            "volume",
+            "vwap",
+            "average",
+        ):
+            getattr(ring, column)[:count] = (
+                data[column].to_numpy(dtype=np.float64, na_value=np.nan)
+                if column in data.columns
+                else 0.0
+            )
+
+        ring.idx = {int(t): i for i, t in enumerate(ring.ts[:count])}
+        ring.head = count % ring.ts.size
+        ring.size = count
+        return ring
+
+    def __len__(self) -> int:
+        return self.size
+
+    def update(
+        self,
+        minute_epoch: int,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+        vwap: Optional[float],
+        average: Optional[float],
+    ) -> None:
+        """
+        aggregate a (second or minute) bar into the bar of minute_epoch.
+        Updates to the newest minute are patched into the cached DataFrame,
+        a new (or older) minute has it rebuilt on the next as_dataframe().
+        :param minute_epoch: bar start, in epoch seconds floored to minute
+        """
+        i = self.idx.get(minute_epoch)
+        if i is None:
+            i = self.head
+            if self.size == self.ts.size:
+                evicted = int(self.ts[i])
+                if self.idx.get(evicted) == i:
+                    del self.idx[evicted]
+            else:
+                self.size += 1
+
+            self.idx[minute_epoch] = i
+            self.head = (i + 1) % self.ts.size
+            self.ts[i] = minute_epoch
+            self.open[i] = open
+            self.high[i] = high
+            self.low[i] = low
+            self.volume[i] = volume
+            self._df = None
+        else:
+            if high > self.high[i]:
+                self.high[i] = high
+            if low < self.low[i]:
+                self.low[i] = low
+            self.volume[i] += volume
+
+        self.close[i] = close
+        self.vwap[i] = vwap
+        self.average[i] = average
+
+        if self._df is not None:
+            if i == (self.head - 1) % self.ts.size:
+                self._df.iloc[-1, :7] = (
+                    self.open[i],
+                    self.high[i],
+                    self.low[i],
+                    self.close[i],
+                    self.volume[i],
+                    self.vwap[i],
+                    self.average[i],
+                )
+            else:
+                self._df = None
+
+    def as_dataframe(self) -> df:
+        """
+        DataFrame view of the ring, oldest bar first. The DataFrame is built
+        lazily, and re-used until a minute rolls over (or an older bar is
+        updated); same-minute updates only patch its last row.
+        """
+        if self._df is not None:
+            return self._df
+
+        capacity = self.ts.size
+        order = np.arange(self.head - self.size, self.head) % capacity
+        self._df = df(
+            {
+                "open": self.open[order],
+                "high": self.high[order],
+                "low": self.low[order],
+                "close": self.close[order],
+                "volume": self.volume[order],
+                "vwap": self.vwap[order],
+                "average": self.average[order],
+            },
+            index=pd.DatetimeIndex(
+                pd.to_datetime(self.ts[order], unit="s", utc=True),
+                name="timestamp",
+            ).tz_convert(NY),
+        )
+        return self._df
@@ -19,3 +19,9 @@ def tlog(msg: str) -> None:
             print(f"[Error] exception when trying to log to Stackdriver {e}")
             pass
     print(f"[{os.getpid()}]{datetime.now()}:{msg}", flush=True)
+
+
+def tlog_debug(msg: str, *args) -> None:
+    """tlog() w/ lazy formatting, skipped unless config.debug_enabled"""
+    if config.debug_enabled:
+        tlog(msg % args if args else msg)
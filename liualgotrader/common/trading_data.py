@@ -5,9 +5,22 @@ from typing import Dict, List, Optional, Tuple
 
 from alpaca_trade_api.entity import Order
 
+from liualgotrader.common.minute_ring import MinuteRing
 from liualgotrader.models.ticker_snapshot import TickerSnapshot
 from liualgotrader.strategies.base import Strategy
 
+
+class SymbolState:
+    """Consumer per-symbol state, fetched w/ a single lookup per event"""
+
+    __slots__ = ("history", "shortable", "data_errors")
+
+    def __init__(self, history: MinuteRing, shortable: bool = True):
+        self.history = history
+        self.shortable = shortable
+        self.data_errors: int = 0
+
+
 strategies: List[Strategy] = []
 open_orders: Dict[str, Tuple[Order, str]] = {}
 open_order_strategy: Dict[str, Strategy] = {}
@@ -36,3 +49,5 @@ queues: Dict[str, Queue] = {}
 down_cross: Dict[str, datetime] = {}
 
 buy_time: Dict[str, datetime] = {}
+
+states: Dict[str, SymbolState] = {}
@@ -0,0 +1,6 @@
+"""Market timezone, shared as a single cached pytz instance"""
+import pytz
+
+# pytz, not zoneinfo: the pinned pandas predates zoneinfo support, and
+# can't mix the two in Timestamp arithmetic
+NY = pytz.timezone("America/New_York")
@@ -1,34 +1,53 @@
 import asyncio
+import functools
 import importlib.util
-import json
 import os
 import sys
+import time
 import traceback
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, tzinfo
 from multiprocessing import Queue
 from queue import Empty
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import alpaca_trade_api as tradeapi
 import pandas as pd
-import pygit2
-from alpaca_trade_api.entity import Order
+from alpaca_trade_api.entity import Order, Position
 from alpaca_trade_api.rest import APIError
 from pandas import DataFrame as df
-from pytz import timezone
-from pytz.tzinfo import DstTzInfo
 
-from liualgotrader.common import config, market_data, trading_data
+try:
+    import uvloop
+except ImportError:
+    uvloop = None  # type: ignore
+
+from liualgotrader import hot_handlers
+from liualgotrader.common import config, fast_json, market_data, trading_data
+from liualgotrader.common.build_label import get_build_label
 from liualgotrader.common.database import create_db_connection
-from liualgotrader.common.tlog import tlog
+from liualgotrader.common.minute_ring import MinuteRing
+from liualgotrader.common.tlog import tlog, tlog_debug
+from liualgotrader.common.trading_data import SymbolState
+from liualgotrader.common.tz import NY
 from liualgotrader.fincalcs.data_conditions import (QUOTE_SKIP_CONDITIONS,
                                                     TRADE_CONDITIONS)
 from liualgotrader.models.new_trades import NewTrade
 from liualgotrader.models.trending_tickers import TrendingTickers
 from liualgotrader.strategies.base import Strategy, StrategyType
 
-shortable: Dict = {}
-symbol_data_error: Dict = {}
+
+# completed trades pending a database write, see trade_writer(). Trades
+# are kept in memory only, until the writer's next batch is saved: a
+# consumer crash in-between loses them (the fills remain on the broker's
+# side). queue_consumer() yields after every message to keep that window
+# to a few event-loop turns, and teardown_task() waits for the queue to
+# drain before exiting.
+trade_writes: asyncio.Queue
+TRADE_WRITE_BATCH = 256
+
+# end-of-day liquidation window boundaries (epoch), set on startup
+liquidation_start_epoch: int = 0
+market_close_epoch: int = 0
 
 
 async def end_time(reason: str):
@@ -62,7 +81,7 @@ async def is_shortable(trading_api: tradeapi, symbol: str) -> bool:
 async def liquidator(trading_api: tradeapi) -> None:
     tlog("liquidator() task starting")
     try:
-        dt = datetime.today().astimezone(timezone("America/New_York"))
+        dt = datetime.today().astimezone(NY)
         to_market_close = (
             config.market_close - dt
             if config.market_close > dt
@@ -77,16 +96,22 @@ async def liquidator(trading_api: tradeapi) -> None:
 
     tlog("liquidator() -> starting liqudation process")
     try:
-        for symbol in trading_data.positions:
+        to_liquidate = []
+        for symbol, position in trading_data.positions.items():
+            if position == 0:
+                continue
+
             tlog(f"liquidator() -> checking {symbol}")
             if (
-                trading_data.positions[symbol] != 0
+                not is_liquidation_pending(symbol)
                 and trading_data.last_used_strategy[symbol].type
                 == StrategyType.DAY_TRADE
             ):
-                await liquidate(
-                    symbol, int(trading_data.positions[symbol]), trading_api
+                to_liquidate.append(
+                    liquidate(symbol, int(position), trading_api)
                 )
+
+        await asyncio.gather(*to_liquidate)
     except asyncio.CancelledError:
         tlog("liquidator() cancelled")
     except KeyboardInterrupt:
@@ -95,7 +120,54 @@ async def liquidator(trading_api: tradeapi) -> None:
     tlog("liquidator() task completed")
 
 
-async def teardown_task(tz: DstTzInfo, task: asyncio.Task) -> None:
+def is_liquidation_pending(symbol: str) -> bool:
+    """a liquidation order for symbol is being submitted, see liquidate()"""
+    open_order = trading_data.open_orders.get(symbol)
+    return open_order is not None and open_order[0] is None
+
+
+async def trade_writer() -> None:
+    tlog("trade_writer() task starting")
+    try:
+        while True:
+            records = [await trade_writes.get()]
+            while (
+                not trade_writes.empty() and len(records) < TRADE_WRITE_BATCH
+            ):
+                records.append(trade_writes.get_nowait())
+
+            try:
+                await save_trades(records)
+            finally:
+                for _ in records:
+                    trade_writes.task_done()
+
+    except asyncio.CancelledError:
+        tlog("trade_writer() cancelled")
+
+    tlog("trade_writer() task completed")
+
+
+async def save_trades(records: List[Tuple]) -> None:
+    try:
+        await NewTrade.save_many(config.db_conn_pool, records)
+        return
+    except Exception as e:
+        tlog(
+            f"[ERROR] trade_writer() failed to save {len(records)} trades w/ exception of type {type(e).__name__} with args {e.args}"
+        )
+        if len(records) == 1:
+            tlog(f"[ERROR] trade_writer() dropped trade {records[0]}")
+            return
+
+    # a single bad row fails the whole batch, retry the rows one by one
+    for record in records:
+        await save_trades([record])
+
+
+async def teardown_task(
+    tz: tzinfo, task: asyncio.Task, writer_task: asyncio.Task
+) -> None:
     tlog(f"consumer-teardown_task() - starting ")
 
     if not config.market_close:
@@ -134,6 +206,10 @@ async def teardown_task(tz: DstTzInfo, task: asyncio.Task) -> None:
         except asyncio.CancelledError:
             tlog("consumer-teardown_task(): tasks are cancelled now")
 
+        tlog("consumer-teardown_task(): waiting for pending trades to save")
+        await trade_writes.join()
+        writer_task.cancel()
+
     except asyncio.CancelledError:
         tlog("consumer-teardown_task() cancelled during sleep")
     except KeyboardInterrupt:
@@ -147,6 +223,12 @@ async def teardown_task(tz: DstTzInfo, task: asyncio.Task) -> None:
         tlog("consumer-teardown_task() task done.")
 
 
+def init_symbol_data(symbol: str) -> None:
+    """pre-set per-symbol trading data, so hot paths skip default handling"""
+    trading_data.positions.setdefault(symbol, 0)
+    trading_data.partial_fills.setdefault(symbol, 0)
+
+
 async def liquidate(
     symbol: str,
     symbol_position: int,
@@ -157,49 +239,57 @@ async def liquidate(
         tlog(
             f"Trading over, trying to liquidate remaining position {symbol_position} in {symbol}"
         )
-        try:
-            if symbol_position < 0:
-                o = trading_api.submit_order(
-                    symbol=symbol,
-                    qty=str(-symbol_position),
-                    side="buy",
-                    type="market",
-                    time_in_force="day",
-                )
-                op = "buy"
-                trading_data.buy_indicators[symbol] = {"liquidation": 1}
+        op = "buy" if symbol_position < 0 else "sell"
+        indicators = (
+            trading_data.buy_indicators
+            if op == "buy"
+            else trading_data.sell_indicators
+        )
 
-            else:
-                o = trading_api.submit_order(
+        # mark the order as pending before yielding, so bars handled while
+        # the order is submitted do not liquidate the symbol again
+        pending = (None, op)
+        trading_data.open_orders[symbol] = pending  # type: ignore
+        trading_data.open_order_strategy[
+            symbol
+        ] = trading_data.last_used_strategy[symbol]
+        indicators[symbol] = {"liquidation": 1}
+        try:
+            # submit from the default executor, so liquidations of several
+            # symbols are in-flight concurrently
+            o = await asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(
+                    trading_api.submit_order,
                     symbol=symbol,
-                    qty=str(symbol_position),
-                    side="sell",
+                    qty=str(abs(symbol_position)),
+                    side=op,
                     type="market",
                     time_in_force="day",
-                )
-                op = "sell"
-                trading_data.sell_indicators[symbol] = {"liquidation": 1}
-
-            trading_data.open_orders[symbol] = (o, op)
-            trading_data.open_order_strategy[
-                symbol
-            ] = trading_data.last_used_strategy[symbol]
+                ),
+            )
+            # a fill may have been handled while submitting
+            if trading_data.open_orders.get(symbol) is pending:
+                trading_data.open_orders[symbol] = (o, op)
 
         except Exception as e:
             tlog(f"failed to liquidate {symbol} w exception {e}")
+            if trading_data.open_orders.get(symbol) is pending:
+                trading_data.open_orders.pop(symbol, None)
+                trading_data.open_order_strategy.pop(symbol, None)
+                indicators.pop(symbol, None)
 
 
-async def should_cancel_order(order: Order, market_clock: datetime) -> bool:
-    # Make sure the order's not too old
-    submitted_at = order.submitted_at.astimezone(timezone("America/New_York"))
-    order_lifetime = market_clock - submitted_at
-    if market_clock > submitted_at and order_lifetime.seconds // 60 >= 1:
-        return True
+def should_cancel_order(order: Order, market_clock_epoch: int) -> bool:
+    # Make sure the order's not too old, submission epoch cached on the order
+    submitted_at = getattr(order, "_sub_epoch", None)
+    if submitted_at is None:
+        submitted_at = order._sub_epoch = int(order.submitted_at.timestamp())
 
-    return False
+    return market_clock_epoch - submitted_at >= 60
 
 
-async def save(
+def save(
     symbol: str,
     new_qty: int,
     last_op: str,
@@ -216,105 +306,102 @@ async def save(
         indicators=indicators,
     )
 
-    await db_trade.save(
-        config.db_conn_pool,
-        str(now),
-        trading_data.stop_prices[symbol],
-        trading_data.target_prices[symbol],
+    trade_writes.put_nowait(
+        db_trade.as_record(
+            str(now),
+            trading_data.stop_prices[symbol],
+            trading_data.target_prices[symbol],
+        )
     )
 
 
-async def get_order(api: tradeapi, order_id: str) -> Order:
+def get_order(api: tradeapi, order_id: str) -> Order:
     return api.get_order(order_id)
 
 
 async def update_partially_filled_order(
     strategy: Strategy, order: Order
 ) -> None:
+    symbol = order.symbol
+    side = order.side
+    filled_avg_price = float(order.filled_avg_price)
+    partial_fill = trading_data.partial_fills[symbol]
+
     qty = int(order.filled_qty)
-    new_qty = qty - abs(trading_data.partial_fills.get(order.symbol, 0))
-    if order.side == "sell":
+    new_qty = qty - abs(partial_fill)
+    if side == "sell":
         qty = qty * -1
 
-    trading_data.positions[order.symbol] = trading_data.positions.get(
-        order.symbol, 0
-    ) - trading_data.partial_fills.get(order.symbol, 0)
-    trading_data.partial_fills[order.symbol] = qty
-    trading_data.positions[order.symbol] += qty
-    trading_data.open_orders[order.symbol] = (
+    trading_data.positions[symbol] += qty - partial_fill
+    trading_data.partial_fills[symbol] = qty
+    trading_data.open_orders[symbol] = (
         order,
-        trading_data.open_orders.get(order.symbol)[1],  # type: ignore
+        trading_data.open_orders.get(symbol)[1],  # type: ignore
     )
 
     try:
         indicators = {
-            "buy": trading_data.buy_indicators.get(order.symbol, None),
-            "sell": trading_data.sell_indicators.get(order.symbol, None),
+            "buy": trading_data.buy_indicators.get(symbol, None),
+            "sell": trading_data.sell_indicators.get(symbol, None),
         }
     except KeyError:
         indicators = {}
 
-    await save(
-        order.symbol,
+    save(
+        symbol,
         int(new_qty),
-        order.side,
-        float(order.filled_avg_price),
+        side,
+        filled_avg_price,
         indicators,
         order.updated_at,
     )
 
-    if order.side == "buy":
-        await strategy.buy_callback(
-            order.symbol, float(order.filled_avg_price), int(new_qty)
-        )
+    if side == "buy":
+        await strategy.buy_callback(symbol, filled_avg_price, int(new_qty))
     else:
-        await strategy.sell_callback(
-            order.symbol, float(order.filled_avg_price), int(new_qty)
-        )
+        await strategy.sell_callback(symbol, filled_avg_price, int(new_qty))
 
 
 async def update_filled_order(strategy: Strategy, order: Order) -> None:
+    symbol = order.symbol
+    side = order.side
+    filled_avg_price = float(order.filled_avg_price)
+    partial_fill = trading_data.partial_fills[symbol]
+
     qty = int(order.filled_qty)
-    new_qty = qty - abs(trading_data.partial_fills.get(order.symbol, 0))
-    if order.side == "sell":
+    new_qty = qty - abs(partial_fill)
+    if side == "sell":
         qty = qty * -1
 
-    trading_data.positions[order.symbol] = trading_data.positions.get(
-        order.symbol, 0
-    ) - trading_data.partial_fills.get(order.symbol, 0)
-    trading_data.partial_fills[order.symbol] = 0
-    trading_data.positions[order.symbol] += qty
+    trading_data.positions[symbol] += qty - partial_fill
+    trading_data.partial_fills[symbol] = 0
 
     try:
         indicators = {
-            "buy": trading_data.buy_indicators.get(order.symbol, None),
-            "sell": trading_data.sell_indicators.get(order.symbol, None),
+            "buy": trading_data.buy_indicators.get(symbol, None),
+            "sell": trading_data.sell_indicators.get(symbol, None),
         }
     except KeyError:
         indicators = {}
 
-    await save(
-        order.symbol,
+    save(
+        symbol,
         int(new_qty),
-        order.side,
-        float(order.filled_avg_price),
+        side,
+        filled_avg_price,
         indicators,
         order.filled_at,
     )
 
-    if order.side == "buy":
-        trading_data.buy_indicators.pop(order.symbol, None)
-        await strategy.buy_callback(
-            order.symbol, float(order.filled_avg_price), int(new_qty)
-        )
+    if side == "buy":
+        trading_data.buy_indicators.pop(symbol, None)
+        await strategy.buy_callback(symbol, filled_avg_price, int(new_qty))
     else:
-        trading_data.sell_indicators.pop(order.symbol, None)
-        await strategy.sell_callback(
-            order.symbol, float(order.filled_avg_price), int(new_qty)
-        )
+        trading_data.sell_indicators.pop(symbol, None)
+        await strategy.sell_callback(symbol, filled_avg_price, int(new_qty))
 
-    trading_data.open_orders.pop(order.symbol, None)
-    trading_data.open_order_strategy.pop(order.symbol, None)
+    trading_data.open_orders.pop(symbol, None)
+    trading_data.open_order_strategy.pop(symbol, None)
 
 
 async def handle_trade_update_for_order(data: Dict) -> bool:
@@ -323,7 +410,8 @@ async def handle_trade_update_for_order(data: Dict) -> bool:
     last_order = trading_data.open_orders.get(symbol)[0]  # type: ignore
     if last_order is not None:
         event = data["event"]
-        tlog(f"trade update for {symbol} data={data} with event {event}")
+        tlog(f"trade update for {symbol} with event {event}")
+        tlog_debug("trade update for %s data=%s", symbol, data)
 
         if event == "partial_fill":
             await update_partially_filled_order(
@@ -334,7 +422,7 @@ async def handle_trade_update_for_order(data: Dict) -> bool:
                 trading_data.open_order_strategy[symbol], Order(data["order"])
             )
         elif event in ("canceled", "rejected"):
-            trading_data.partial_fills.pop(symbol, None)
+            trading_data.partial_fills[symbol] = 0
             trading_data.open_orders.pop(symbol, None)
             trading_data.open_order_strategy.pop(symbol, None)
 
@@ -349,9 +437,8 @@ async def handle_trade_update_for_order(data: Dict) -> bool:
 async def handle_trade_update_wo_order(data: Dict) -> bool:
     symbol = data["symbol"]
     event = data["event"]
-    tlog(
-        f"trade update without order for {symbol} data={data} with event {event}"
-    )
+    tlog(f"trade update without order for {symbol} with event {event}")
+    tlog_debug("trade update without order for %s data=%s", symbol, data)
 
     if event == "partial_fill":
         await update_partially_filled_order(
@@ -362,27 +449,78 @@ async def handle_trade_update_wo_order(data: Dict) -> bool:
             trading_data.last_used_strategy[symbol], Order(data["order"])
         )
     elif event in ("canceled", "rejected"):
-        trading_data.partial_fills.pop(symbol, None)
+        trading_data.partial_fills[symbol] = 0
 
     return True
 
 
 async def handle_trade_update(data: Dict) -> bool:
     symbol = data["symbol"]
-    if trading_data.open_orders.get(symbol):
+    # trade updates may arrive ahead of any data event for the symbol
+    init_symbol_data(symbol)
+    open_order = trading_data.open_orders.get(symbol)
+    if open_order and open_order[0] is not None:
         return await handle_trade_update_for_order(data)
     else:
         return await handle_trade_update_wo_order(data)
 
 
+async def run_strategies(
+    strategies: List[Strategy],
+    symbol: str,
+    st: SymbolState,
+    position: int,
+    now: pd.Timestamp,
+    trading_api: tradeapi,
+) -> AsyncIterator[Tuple[Strategy, Any]]:
+    """
+    yield each strategy w/ its run() result, or the exception it raised,
+    in strategies order. run() calls are awaited concurrently only if all
+    strategies are independent, otherwise lazily one after the other.
+    """
+    if len(strategies) > 1 and all(s.independent for s in strategies):
+        minute_history = st.history.as_dataframe()
+        results = await asyncio.gather(
+            *(
+                s.run(
+                    symbol,
+                    st.shortable,
+                    position,
+                    minute_history,
+                    now,
+                    trading_api=trading_api,
+                    portfolio_value=config.portfolio_value,
+                )
+                for s in strategies
+            ),
+            return_exceptions=True,
+        )
+        for s, result in zip(strategies, results):
+            yield s, result
+        return
+
+    for s in strategies:
+        try:
+            result = await s.run(
+                symbol,
+                st.shortable,
+                position,
+                st.history.as_dataframe(),
+                now,
+                trading_api=trading_api,
+                portfolio_value=config.portfolio_value,
+            )
+        except Exception as e:
+            result = e
+        yield s, result
+
+
 async def handle_data_queue_msg(
     data: Dict, trading_api: tradeapi, data_api: tradeapi
 ) -> bool:
-    global shortable
-    global symbol_data_error
-
     symbol = data["symbol"]
-    if symbol not in market_data.minute_history:
+    st = trading_data.states.get(symbol)
+    if st is None:
         _df = data_api.polygon.historic_agg_v2(
             symbol,
             1,
@@ -392,22 +530,24 @@ async def handle_data_queue_msg(
         ).df
         _df["vwap"] = 0.0
         _df["average"] = 0.0
-        market_data.minute_history[symbol] = _df
+        st = trading_data.states[symbol] = SymbolState(
+            history=MinuteRing.from_dataframe(_df),
+            shortable=True,  # await is_shortable(data_api, symbol)
+        )
+        init_symbol_data(symbol)
         tlog(
-            f"consumer task loaded {len(market_data.minute_history[symbol].index)} 1-min candles for {symbol}"
+            f"consumer task loaded {len(st.history)} 1-min candles for {symbol}"
         )
-        shortable[symbol] = True  # await is_shortable(data_api, symbol)
-    elif not shortable.get(symbol):
-        shortable[symbol] = True  # await is_shortable(data_api, symbol)
 
-    if data["EV"] == "T":
+    event = data["EV"]
+    if event == "T":
         if "conditions" in data and any(
             item in data["conditions"] for item in TRADE_CONDITIONS
         ):
             # tlog(f"trade={data}")
             return True
         return True
-    elif data["EV"] == "Q":
+    elif event == "Q":
         if "askprice" not in data or "bidprice" not in data:
             return True
         if "condition" in data and any(
@@ -416,106 +556,68 @@ async def handle_data_queue_msg(
             return True
 
         # tlog(f"quote={data}")
+        ask_price = data["askprice"]
+        ask_size = data["asksize"]
+        bid_price = data["bidprice"]
+        bid_size = data["bidsize"]
+        quote_ts = data["timestamp"]
+
         prev_ask = trading_data.voi_ask.get(symbol, None)
         prev_bid = trading_data.voi_bid.get(symbol, None)
-        trading_data.voi_ask[symbol] = (
-            data["askprice"],
-            data["asksize"],
-            data["timestamp"],
+        trading_data.voi_ask[symbol] = (ask_price, ask_size, quote_ts)
+        trading_data.voi_bid[symbol] = (bid_price, bid_size, quote_ts)
+
+        hot_handlers.update_voi(
+            trading_data.voi.setdefault(symbol, []),
+            prev_bid,
+            prev_ask,
+            bid_price,
+            bid_size,
+            ask_price,
+            ask_size,
         )
-        trading_data.voi_bid[symbol] = (
-            data["bidprice"],
-            data["bidsize"],
-            data["timestamp"],
-        )
-
-        bid_delta_volume = (
-            0
-            if not prev_bid or data["bidprice"] < prev_bid[0]
-            else 100 * data["bidsize"]
-            if data["bidprice"] > prev_bid[0]
-            else 100 * (data["bidsize"] - prev_bid[1])
-        )
-        ask_delta_volume = (
-            0
-            if not prev_ask or data["askprice"] > prev_ask[0]
-            else 100 * data["asksize"]
-            if data["askprice"] < prev_ask[0]
-            else 100 * (data["asksize"] - prev_ask[1])
-        )
-        voi_stack = trading_data.voi.get(symbol, None)
-        if not voi_stack:
-            voi_stack = [0.0]
-        elif len(voi_stack) == 10:
-            voi_stack[0:9] = voi_stack[1:10]
-            voi_stack.pop()
-
-        k = 2.0 / (100 + 1)
-        voi_stack.append(
-            round(
-                voi_stack[-1] * (1.0 - k)
-                + k * (bid_delta_volume - ask_delta_volume),
-                2,
-            )
-        )
-        trading_data.voi[symbol] = voi_stack
         # tlog(f"{symbol} voi:{trading_data.voi[symbol]}")
 
-    elif data["EV"] in ("A", "AM"):
-        original_ts = ts = pd.Timestamp(
-            data["start"], tz="America/New_York", unit="ms"
+    elif event in ("A", "AM"):
+        start_ms = data["start"]
+        minute_epoch = start_ms // 60000 * 60
+        st.history.update(
+            minute_epoch,
+            data["open"],
+            data["high"],
+            data["low"],
+            data["close"],
+            data["volume"],
+            data["vwap"],
+            data["average"],
         )
-        ts = ts.replace(second=0, microsecond=0)
-
-        try:
-            current = market_data.minute_history[symbol].loc[ts]
-        except KeyError:
-            current = None
-
-        if current is None:
-            new_data = [
-                data["open"],
-                data["high"],
-                data["low"],
-                data["close"],
-                data["volume"],
-                data["vwap"],
-                data["average"],
-            ]
-        else:
-            new_data = [
-                current.open,
-                max(data["high"], current.high),
-                min(data["low"], current.low),
-                data["close"],
-                current.volume + data["volume"],
-                data["vwap"],
-                data["average"],
-            ]
-        market_data.minute_history[symbol].loc[ts] = new_data
         market_data.volume_today[symbol] = data["totalvolume"]
 
-        if data["EV"] == "A":
-            if (time_diff := datetime.now(tz=timezone("America/New_York")) - original_ts) > timedelta(seconds=8):  # type: ignore
-                tlog(f"A$ {symbol} too out of sync w {time_diff}")
-                return False
-            elif (
-                curr_min := datetime.now(
-                    tz=timezone("America/New_York")
-                ).replace(second=0, microsecond=0)
-            ) > ts:
-                return True
-        elif data["EV"] == "AM":
+        if event == "AM":
+            return True
+
+        now_ms = int(time.time() * 1000)
+        if (time_diff := now_ms - start_ms) > 8000:
+            tlog_debug(
+                "A$ %s too out of sync w %s seconds", symbol, time_diff / 1000
+            )
+            return False
+        elif now_ms // 60000 * 60 > minute_epoch:
             return True
 
+        ts = pd.Timestamp(minute_epoch, tz="America/New_York", unit="s")
+
         # Next, check for existing orders for the stock
         existing_order = trading_data.open_orders.get(symbol)
 
         if existing_order is not None:
             existing_order = existing_order[0]
+            if existing_order is None:
+                # liquidation order still being submitted
+                return True
             try:
-                if await should_cancel_order(existing_order, original_ts):
-                    inflight_order = await get_order(
+                if should_cancel_order(existing_order, start_ms // 1000):
+                    inflight_order = get_order(
                         trading_api, existing_order.id  # type: ignore
                     )
                     if inflight_order and inflight_order.status == "filled":
@@ -540,7 +642,7 @@ async def handle_data_queue_msg(
                     else:
                         # Cancel it so we can try again for a fill
                         tlog(
-                            f"Cancel order id {existing_order.id} for {symbol} ts={original_ts} submission_ts={existing_order.submitted_at.astimezone(timezone('America/New_York'))}"  # type: ignore
+                            f"Cancel order id {existing_order.id} for {symbol} ts={pd.Timestamp(start_ms, tz='America/New_York', unit='ms')} submission_ts={existing_order.submitted_at.astimezone(NY)}"  # type: ignore
                         )
                         trading_api.cancel_order(existing_order.id)  # type: ignore
                         trading_data.open_orders.pop(symbol, None)
@@ -550,13 +652,11 @@ async def handle_data_queue_msg(
                 tlog(f"Attribute Error in symbol {symbol} w/ {existing_order}")
 
         # do we have a position?
-        symbol_position = trading_data.positions.get(symbol, 0)
+        symbol_position = trading_data.positions[symbol]
 
         # do we need to liquidate for the day?
-        until_market_close = config.market_close - ts
         if (
-            until_market_close.seconds // 60
-            <= config.market_liquidation_end_time_minutes
+            liquidation_start_epoch <= minute_epoch <= market_close_epoch
             and symbol_position != 0
             and trading_data.last_used_strategy[symbol].type
             == StrategyType.DAY_TRADE
@@ -564,40 +664,27 @@ async def handle_data_queue_msg(
             await liquidate(symbol, int(symbol_position), trading_api)
         else:
             # run strategies
-            for s in trading_data.strategies:
-                if (
-                    "symbol_strategy" in data
-                    and data["symbol_strategy"]
-                    and s.name != data["symbol_strategy"]
-                ):
-                    continue
-
-                try:
-                    do, what = await s.run(
-                        symbol,
-                        shortable[symbol],
-                        int(symbol_position),
-                        market_data.minute_history[symbol],
-                        ts,
-                        trading_api=trading_api,
-                        portfolio_value=config.portfolio_value,
-                    )
-                except Exception as e:
+            symbol_strategy = data.get("symbol_strategy")
+            strategies = [
+                s
+                for s in trading_data.strategies
+                if not (symbol_strategy and s.name != symbol_strategy)
+            ]
+            async for s, result in run_strategies(
+                strategies, symbol, st, int(symbol_position), ts, trading_api
+            ):
+                if isinstance(result, Exception):
                     # exc_info = sys.exc_info()
                     # lines = traceback.format_exception(*exc_info)
                     # for line in lines:
                     #    tlog(f"{line}")
                     # del exc_info
 
-                    symbol_data_error[symbol] = (
-                        0
-                        if symbol not in symbol_data_error
-                        else symbol_data_error[symbol] + 1
-                    )
                     tlog(
-                        f"[EXCEPTION] strategy {s.name} for symbol {symbol} -> {e} [{symbol_data_error[symbol]}]"
+                        f"[EXCEPTION] strategy {s.name} for symbol {symbol} -> {result} [{st.data_errors}]"
                     )
-                    if symbol_data_error[symbol] < 5:
+                    st.data_errors += 1
+                    if st.data_errors <= 5:
                         tlog(f"attempting reload of data for symbol {symbol}")
 
                         _df = data_api.polygon.historic_agg_v2(
@@ -609,12 +696,13 @@ async def handle_data_queue_msg(
                         ).df
                         _df["vwap"] = 0.0
                         _df["average"] = 0.0
-                        market_data.minute_history[symbol] = _df
+                        st.history = MinuteRing.from_dataframe(_df)
                         tlog(
-                            f"consumer task re-loaded {len(market_data.minute_history[symbol].index)} 1-min candles for {symbol}"
+                            f"consumer task re-loaded {len(st.history)} 1-min candles for {symbol}"
                         )
                     continue
 
+                do, what = result
                 if do:
                     try:
                         if what["type"] == "limit":
@@ -638,13 +726,15 @@ async def handle_data_queue_msg(
                         trading_data.open_orders[symbol] = (o, what["side"])
                         trading_data.open_order_strategy[symbol] = s
 
-                        tlog(
-                            f"executed strategy {s.name} on {symbol} w data {market_data.minute_history[symbol][-10:]}"
-                        )
+                        tlog(f"executed strategy {s.name} on {symbol}")
+                        if config.debug_enabled:
+                            tlog(
+                                f"{symbol} data {st.history.as_dataframe()[-10:]}"
+                            )
                         trading_data.last_used_strategy[symbol] = s
                         if what["side"] == "buy":
                             trading_data.buy_time[symbol] = datetime.now(
-                                tz=timezone("America/New_York")
+                                tz=NY
                             ).replace(second=0, microsecond=0)
                             break
                     except APIError as e:
@@ -662,14 +752,22 @@ async def queue_consumer(
 ) -> None:
     tlog("queue_consumer() starting")
 
+    loop = asyncio.get_running_loop()
+    wait_for_data = functools.partial(queue.get, timeout=2)
     try:
         while True:
             try:
-                raw_data = queue.get(timeout=2)
-                data = json.loads(raw_data)
+                try:
+                    raw_data = queue.get_nowait()
+                except Empty:
+                    # idle, wait off the event-loop so trade_writer() and
+                    # the other tasks keep running
+                    raw_data = await loop.run_in_executor(None, wait_for_data)
+
+                data = fast_json.loads(raw_data)
 
                 if data["EV"] == "trade_update":
-                    tlog(f"received trade_update: {data}")
+                    tlog_debug("received trade_update: %s", data)
                     await handle_trade_update(data)
                 else:
                     if not await handle_data_queue_msg(
@@ -679,8 +777,10 @@ async def queue_consumer(
                             _ = queue.get()
                         tlog("cleaned queue")
 
-            except Empty:
+                # give trade_writer() a turn, while the queue is busy
                 await asyncio.sleep(0)
+
+            except Empty:
                 continue
             except Exception as e:
                 tlog(
@@ -709,11 +809,11 @@ async def queue_consumer(
         tlog("queue_consumer() task done.")
 
 
-def get_trading_windows(tz, api):
-    """Get start and end time for trading"""
+def get_trading_windows(tz, api, now: Optional[datetime] = None):
+    """Get start and end time for trading, as of now (default: current time)"""
 
-    today = datetime.today().astimezone(tz)
-    today_str = datetime.today().astimezone(tz).strftime("%Y-%m-%d")
+    today = now or datetime.now(tz)
+    today_str = today.strftime("%Y-%m-%d")
 
     calendar = api.get_calendar(start=today_str, end=today_str)[0]
 
@@ -743,6 +843,10 @@ async def consumer_async_main(
     unique_id: str,
     strategies_conf: Dict,
 ):
+    global liquidation_start_epoch
+    global market_close_epoch
+    global trade_writes
+
     await create_db_connection(str(config.dsn))
 
     if symbols:
@@ -781,10 +885,15 @@ async def consumer_async_main(
         key_id=config.prod_api_key_id,
         secret_key=config.prod_api_secret,
     )
-    nyc = timezone("America/New_York")
     config.market_open, config.market_close = get_trading_windows(
-        nyc, trading_api
+        NY, trading_api, now=datetime.now(NY)
     )
+    if config.market_close:
+        market_close_epoch = int(config.market_close.timestamp())
+        liquidation_start_epoch = (
+            market_close_epoch
+            - config.market_liquidation_end_time_minutes * 60
+        )
     strategy_types = []
     for strategy_name in strategies_conf:
         strategy_details = strategies_conf[strategy_name]
@@ -817,6 +926,16 @@ async def consumer_async_main(
             )
             exit(0)
 
+    open_positions: Dict[str, Position] = {}
+    if symbols:
+        try:
+            open_positions = {
+                position.symbol: position
+                for position in trading_api.list_positions()
+            }
+        except Exception as e:
+            tlog(f"failed to load open positions w/ {e}")
+
     loaded = 0
     for strategy_tuple in strategy_types:
         strategy_type = strategy_tuple[0]
@@ -828,7 +947,7 @@ async def consumer_async_main(
         trading_data.strategies.append(s)
         if symbols:
             loaded += await load_current_positions(
-                trading_api=trading_api,
+                open_positions=open_positions,
                 symbols=symbols,
                 strategy=s,
                 env=config.env,
@@ -839,6 +958,9 @@ async def consumer_async_main(
             f"[ERROR] Consumer process loaded only {loaded} out of {len(symbols)} open positions. HINT: make sure that your tradeplan.toml file includes all strategues in previous trading session."
         )
 
+    trade_writes = asyncio.Queue()
+    trade_writer_task = asyncio.create_task(trade_writer())
+
     queue_consumer_task = asyncio.create_task(
         queue_consumer(queue, trading_api, data_api)
     )
@@ -846,12 +968,13 @@ async def consumer_async_main(
     liquidate_task = asyncio.create_task(liquidator(trading_api))
 
     tear_down = asyncio.create_task(
-        teardown_task(timezone("America/New_York"), queue_consumer_task)
+        teardown_task(NY, queue_consumer_task, trade_writer_task)
     )
     await asyncio.gather(
         tear_down,
         liquidate_task,
         queue_consumer_task,
+        trade_writer_task,
         return_exceptions=True,
     )
 
@@ -859,14 +982,16 @@ async def consumer_async_main(
 
 
 async def load_current_positions(
-    trading_api: tradeapi, symbols: List[str], strategy: Strategy, env: str
+    open_positions: Dict[str, Position],
+    symbols: List[str],
+    strategy: Strategy,
+    env: str,
 ) -> int:
     loaded = 0
     for symbol in symbols:
-        try:
-            position = trading_api.get_position(symbol)
-        except Exception as e:
-            tlog(f"failed to load open position for {symbol} w/ {e}")
+        position = open_positions.get(symbol)
+        if position is None:
+            tlog(f"failed to load open position for {symbol}")
             continue
 
         if position:
@@ -901,9 +1026,7 @@ async def load_current_positions(
                 ] = trading_data.latest_scalp_basis[symbol] = price
                 trading_data.open_order_strategy[symbol] = strategy
                 trading_data.last_used_strategy[symbol] = strategy
-                trading_data.buy_time[symbol] = timestamp.astimezone(
-                    tz=timezone("America/New_York")
-                )
+                trading_data.buy_time[symbol] = timestamp.astimezone(tz=NY)
 
                 await NewTrade.rename_algo_run_id(
                     strategy.algo_run.run_id, prev_run_id, symbol
@@ -933,14 +1056,7 @@ def consumer_main(
 ) -> None:
     tlog(f"*** consumer_main() starting w pid {os.getpid()} ***")
 
-    try:
-        config.build_label = pygit2.Repository("../").describe(
-            describe_strategy=pygit2.GIT_DESCRIBE_TAGS
-        )
-    except pygit2.GitError:
-        import liualgotrader
-
-        config.build_label = liualgotrader.__version__ if hasattr(liualgotrader, "__version__") else ""  # type: ignore
+    config.build_label = get_build_label()
 
     config.bypass_market_schedule = conf.get("bypass_market_schedule", False)
     config.portfolio_value = conf.get("portfolio_value", None)
@@ -951,7 +1067,14 @@ def consumer_main(
             "market_liquidation_end_time_minutes"
         ]
 
-    market_data.minute_history = minute_history
+    for symbol in minute_history:
+        trading_data.states[symbol] = SymbolState(
+            history=MinuteRing.from_dataframe(minute_history[symbol])
+        )
+        init_symbol_data(symbol)
+    if uvloop:
+        uvloop.install()
+
     try:
         if not asyncio.get_event_loop().is_closed():
             asyncio.get_event_loop().close()
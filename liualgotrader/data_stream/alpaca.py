@@ -5,7 +5,7 @@ from typing import Awaitable, Dict, List
 
 import websockets
 
-from liualgotrader.common import market_data
+from liualgotrader.common import fast_json, market_data
 from liualgotrader.common.tlog import tlog
 
 from ..common import config
@@ -132,7 +132,7 @@ class AlpacaStreaming(StreamingBase):
                 _msg = await self.websocket.recv()
                 if isinstance(_msg, bytes):
                     _msg = _msg.decode("utf-8")
-                msg = json.loads(_msg)
+                msg = fast_json.loads(_msg)
                 stream = msg.get("stream")
                 if stream != "listening":
                     try:
@@ -179,7 +179,7 @@ class AlpacaStreaming(StreamingBase):
             data["volume"] = data["v"]
             data["vwap"] = data["vw"]
             data["average"] = data["a"]
-            queue.put(json.dumps(data))
+            queue.put(fast_json.dumps(data))
         except Exception as e:
             tlog(
                 f"Exception in handle_minute_bar(): exception of type {type(e).__name__} with args {e.args}"
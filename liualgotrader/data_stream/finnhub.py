@@ -6,15 +6,13 @@ from typing import Awaitable, Dict, List
 
 import pandas as pd
 import websockets
-from pytz import timezone
 
-from liualgotrader.common import market_data
+from liualgotrader.common import fast_json, market_data
 from liualgotrader.common.tlog import tlog
+from liualgotrader.common.tz import NY
 
 from .streaming_base import StreamingBase, WSConnectState
 
-NY = "America/New_York"
-
 
 class FinnhubStreaming(StreamingBase):
     END_POINT = "wss://ws.finnhub.io?token="
@@ -111,7 +109,7 @@ class FinnhubStreaming(StreamingBase):
                 _msg = await self.websocket.recv()
                 if isinstance(_msg, bytes):
                     _msg = _msg.decode("utf-8")
-                msg = json.loads(_msg)
+                msg = fast_json.loads(_msg)
 
                 event = msg.get("type")
                 if event == "ping":
@@ -125,7 +123,7 @@ class FinnhubStreaming(StreamingBase):
                             volume = item["v"]
                             start = pd.Timestamp(item["t"], tz=NY, unit="ms")
                             time_diff = (
-                                datetime.now(tz=timezone("America/New_York")) - start
+                                datetime.now(tz=NY) - start
                             )
                             if time_diff > timedelta(seconds=6):  # type: ignore
                                 tlog(f"{symbol}: data out of sync {time_diff}")
@@ -204,4 +202,4 @@ class FinnhubStreaming(StreamingBase):
             "start": when,
             "totalvolume": market_data.volume_today[symbol],
         }
-        queue.put(json.dumps(payload))
+        queue.put(fast_json.dumps(payload))
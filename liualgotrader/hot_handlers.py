@@ -0,0 +1,56 @@
+"""
+Per-quote volume-order-imbalance (VOI) update of the consumer.
+
+Kept free of pandas / alpaca types and fully annotated, so the module
+can be compiled to a C extension with mypyc (see setup.py, LIU_MYPYC=1).
+The pure-Python module is used as-is otherwise.
+"""
+from typing import Any, List, Optional, Tuple
+
+VOI_STACK_SIZE: int = 10
+VOI_EMA_K: float = 2.0 / (100 + 1)
+
+
+def update_voi(
+    stack: List[float],
+    prev_bid: Optional[Tuple[float, float, Any]],
+    prev_ask: Optional[Tuple[float, float, Any]],
+    bid_price: float,
+    bid_size: float,
+    ask_price: float,
+    ask_size: float,
+) -> None:
+    """
+    append the next VOI EMA value to stack, keeping the last
+    VOI_STACK_SIZE values
+    :param prev_bid: previous (price, size, timestamp) bid, if any
+    :param prev_ask: previous (price, size, timestamp) ask, if any
+    """
+    bid_delta_volume = 0.0
+    if prev_bid is not None and bid_price >= prev_bid[0]:
+        bid_delta_volume = (
+            100.0 * bid_size
+            if bid_price > prev_bid[0]
+            else 100.0 * (bid_size - prev_bid[1])
+        )
+
+    ask_delta_volume = 0.0
+    if prev_ask is not None and ask_price <= prev_ask[0]:
+        ask_delta_volume = (
+            100.0 * ask_size
+            if ask_price < prev_ask[0]
+            else 100.0 * (ask_size - prev_ask[1])
+        )
+
+    if not stack:
+        stack.append(0.0)
+    elif len(stack) == VOI_STACK_SIZE:
+        del stack[0]
+
+    stack.append(
+        round(
+            stack[-1] * (1.0 - VOI_EMA_K)
+            + VOI_EMA_K * (bid_delta_volume - ask_delta_volume),
+            2,
+        )
+    )
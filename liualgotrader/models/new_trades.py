@@ -62,6 +62,37 @@ class NewTrade:
                     target_price,
                 )
 
+    def as_record(
+        self,
+        client_buy_time: str,
+        stop_price=None,
+        target_price=None,
+    ) -> Tuple:
+        """row values, in save_many() column order"""
+        return (
+            self.algo_run_id,
+            self.symbol,
+            self.operation,
+            self.qty,
+            self.price,
+            json.dumps(self.indicators if self.indicators else {}),
+            client_buy_time,
+            stop_price,
+            target_price,
+        )
+
+    @classmethod
+    async def save_many(cls, pool: Pool, records: List[Tuple]) -> None:
+        async with pool.acquire() as con:
+            async with con.transaction():
+                await con.executemany(
+                    """
+                        INSERT INTO new_trades (algo_run_id, symbol, operation, qty, price, indicators, client_time, stop_price, target_price)
+                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                    """,
+                    records,
+                )
+
     @classmethod
     async def expire_trade(cls, pool: Pool, trade_id: int) -> None:
         async with pool.acquire() as con:
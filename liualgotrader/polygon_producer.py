@@ -2,36 +2,43 @@
 Get Market data from Polygon and pump to consumers
 """
 import asyncio
-import json
 import os
 import random
 import sys
+import time
 import traceback
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, tzinfo
 from multiprocessing import Queue
 from queue import Empty, Full
 from typing import Dict, List
 
 import alpaca_trade_api as tradeapi
+from alpaca_trade_api import stream2
+from alpaca_trade_api.polygon import streamconn
 from alpaca_trade_api.stream2 import StreamConn, polygon
-from pytz import timezone
-from pytz.tzinfo import DstTzInfo
 
-from liualgotrader.common import config
+try:
+    import uvloop
+except ImportError:
+    uvloop = None  # type: ignore
+
+from liualgotrader.common import config, fast_json
 from liualgotrader.common.database import create_db_connection
 from liualgotrader.common.tlog import tlog
+from liualgotrader.common.tz import NY
 from liualgotrader.models.trending_tickers import TrendingTickers
 
-last_msg_tstamp: datetime = datetime.now()
+# per web-socket shard
+last_msg_tstamp: List[datetime] = []
+data_channels: List[List[str]] = []
 symbols: List[str]
-data_channels: List = []
 queue_id_hash: Dict[str, int]
 symbol_strategy: Dict = {}
 
 
 async def scanner_input(
     scanner_queue: Queue,
-    data_ws: StreamConn,
+    data_ws: List[StreamConn],
     num_consumer_processes: int,
 ) -> None:
     tlog("scanner_input() task starting ")
@@ -44,19 +51,25 @@ async def scanner_input(
         try:
             symbols_details = scanner_queue.get(timeout=1)
             if symbols_details:
-                symbols_details = json.loads(symbols_details)
+                symbols_details = fast_json.loads(symbols_details)
                 new_symbols: List = []
-                new_channels: List = []
+                new_channels: Dict[int, List[str]] = {}
                 for symbol_details in symbols_details:
                     if symbol_details["symbol"] not in symbols:
                         new_symbols.append(symbol_details["symbol"])
                         symbol_strategy[
                             symbol_details["symbol"]
                         ] = symbol_details["target_strategy_name"]
-                        new_channels += [
+                        # subscribe on the least loaded shard
+                        shard = min(
+                            range(len(data_channels)),
+                            key=lambda i: len(data_channels[i])
+                            + len(new_channels.get(i, [])),
+                        )
+                        new_channels.setdefault(shard, []).extend(
                             f"{OP}.{symbol_details['symbol']}"
                             for OP in config.WS_DATA_CHANNELS
-                        ]
+                        )
                         consumer_queue_index = random.SystemRandom().randint(
                             0, num_consumer_processes - 1
                         )
@@ -66,21 +79,25 @@ async def scanner_input(
 
                 if len(new_symbols):
                     symbols += new_symbols
-                    data_channels += new_channels
-
-                    retry = 5
-                    while retry > 0:
-                        try:
-                            await data_ws.subscribe(new_channels)
-                            break
-                        except Exception as e:
-                            tlog(f"[EXCEPTION] {e} below, retrying {retry}")
-                            exc_info = sys.exc_info()
-                            lines = traceback.format_exception(*exc_info)
-                            for line in lines:
-                                tlog(f"error: {line}")
-                            await asyncio.sleep(1)
-                            retry -= 1
+
+                    for shard, shard_channels in new_channels.items():
+                        data_channels[shard] += shard_channels
+
+                        retry = 5
+                        while retry > 0:
+                            try:
+                                await data_ws[shard].subscribe(shard_channels)
+                                break
+                            except Exception as e:
+                                tlog(
+                                    f"[EXCEPTION] {e} below, retrying {retry}"
+                                )
+                                exc_info = sys.exc_info()
+                                lines = traceback.format_exception(*exc_info)
+                                for line in lines:
+                                    tlog(f"error: {line}")
+                                await asyncio.sleep(1)
+                                retry -= 1
 
                     trending_db = TrendingTickers(config.batch_id)
                     await trending_db.save(new_symbols)
@@ -123,7 +140,7 @@ async def trade_run(
             if qid := queue_id_hash.get(symbol, None):
                 data.__dict__["_raw"]["EV"] = "trade_update"
                 data.__dict__["_raw"]["symbol"] = symbol
-                queues[qid].put(json.dumps(data.__dict__["_raw"]))
+                queues[qid].put(fast_json.dumps(data.__dict__["_raw"]))
 
         except Exception as e:
             tlog(
@@ -138,29 +155,31 @@ async def trade_run(
 async def run(
     data_ws: StreamConn,
     queues: List[Queue],
+    shard: int,
+    shard_symbols: List[str],
 ) -> None:
-    global data_channels
     global queue_id_hash
-    for symbol in symbols:
+    for symbol in shard_symbols:
         symbol_channels = [f"{OP}.{symbol}" for OP in config.WS_DATA_CHANNELS]
-        data_channels += symbol_channels
+        data_channels[shard] += symbol_channels
 
-    tlog(f"Watching {len(symbols)} symbols from Polygon.io")
+    tlog(
+        f"Watching {len(shard_symbols)} symbols from Polygon.io on shard {shard}"
+    )
 
     @data_ws.on(r"T$")
     async def handle_trade_event(conn, channel, data):
-        global last_msg_tstamp
-        last_msg_tstamp = datetime.now()
+        last_msg_tstamp[shard] = datetime.now()
 
         queue_id: int = -1
         try:
-            if (time_diff := datetime.now(tz=timezone("America/New_York")) - data.timestamp) > timedelta(seconds=10):  # type: ignore
+            if (time_diff := time.time() - data.timestamp.timestamp()) > 10:  # type: ignore
                 return
             elif (event_symbol := data.__dict__["_raw"]["symbol"]) in queue_id_hash:  # type: ignore
                 data.__dict__["_raw"]["EV"] = "T"
                 queue_id = queue_id_hash[event_symbol]
                 queues[queue_id].put(
-                    json.dumps(data.__dict__["_raw"]), timeout=1
+                    fast_json.dumps(data.__dict__["_raw"]), timeout=1
                 )
         except Full as f:
             tlog(
@@ -177,18 +196,17 @@ async def run(
 
     @data_ws.on(r"Q$")
     async def handle_quote_event(conn, channel, data):
-        global last_msg_tstamp
-        last_msg_tstamp = datetime.now()
+        last_msg_tstamp[shard] = datetime.now()
 
         queue_id: int = -1
         try:
-            if (time_diff := datetime.now(tz=timezone("America/New_York")) - data.timestamp) > timedelta(seconds=10):  # type: ignore
+            if (time_diff := time.time() - data.timestamp.timestamp()) > 10:  # type: ignore
                 return
             elif (event_symbol := data.__dict__["_raw"]["symbol"]) in queue_id_hash:  # type: ignore
                 data.__dict__["_raw"]["EV"] = "Q"
                 queue_id = queue_id_hash[event_symbol]
                 queues[queue_id].put(
-                    json.dumps(data.__dict__["_raw"]), timeout=1
+                    fast_json.dumps(data.__dict__["_raw"]), timeout=1
                 )
 
         except Full as f:
@@ -207,13 +225,12 @@ async def run(
 
     @data_ws.on(r"A$")
     async def handle_second_bar(conn, channel, data):
-        global last_msg_tstamp
         global symbol_strategy
-        last_msg_tstamp = datetime.now()
+        last_msg_tstamp[shard] = datetime.now()
 
         queue_id: int = -1
         try:
-            if (time_diff := datetime.now(tz=timezone("America/New_York")) - data.start) > timedelta(seconds=8):  # type: ignore
+            if (time_diff := time.time() - data.start.timestamp()) > 8:  # type: ignore
                 # tlog(f"A$ {data.symbol}: data out of sync {time_diff}")
                 pass
             elif (event_symbol := data.__dict__["_raw"]["symbol"]) in queue_id_hash:  # type: ignore
@@ -227,7 +244,7 @@ async def run(
                     ]
                 queue_id = queue_id_hash[event_symbol]
                 queues[queue_id].put(
-                    json.dumps(data.__dict__["_raw"]), timeout=1
+                    fast_json.dumps(data.__dict__["_raw"]), timeout=1
                 )
         except Full as f:
             tlog(
@@ -244,9 +261,8 @@ async def run(
 
     @data_ws.on(r"AM$")
     async def handle_minute_bar(conn, channel, data):
-        global last_msg_tstamp
         global symbol_strategy
-        last_msg_tstamp = datetime.now()
+        last_msg_tstamp[shard] = datetime.now()
 
         queue_id: int = -1
         try:
@@ -261,7 +277,7 @@ async def run(
                     ]
                 queue_id = queue_id_hash[event_symbol]
                 queues[queue_id].put(
-                    json.dumps(data.__dict__["_raw"]), timeout=1
+                    fast_json.dumps(data.__dict__["_raw"]), timeout=1
                 )
 
         except Full as f:
@@ -277,17 +293,16 @@ async def run(
             )
             traceback.print_exc()
 
-    global last_msg_tstamp
     try:
-        await data_ws.subscribe(data_channels)
+        await data_ws.subscribe(data_channels[shard])
 
         while True:
-            # print(f"tick! {datetime.now() - last_msg_tstamp}")
-            if (datetime.now() - last_msg_tstamp) > timedelta(
+            # print(f"tick! {datetime.now() - last_msg_tstamp[shard]}")
+            if (datetime.now() - last_msg_tstamp[shard]) > timedelta(
                 seconds=config.polygon_seconds_timeout
             ):
                 tlog(
-                    f"no data activity since {last_msg_tstamp} attempting reconnect"
+                    f"no data activity on shard {shard} since {last_msg_tstamp[shard]} attempting reconnect"
                 )
                 await data_ws.close(False)
                 data_ws.data_ws = polygon.StreamConn(config.prod_api_key_id)
@@ -296,11 +311,11 @@ async def run(
                 data_ws.register(r"A$", handle_second_bar)
                 data_ws.register(r"Q$", handle_quote_event)
                 data_ws.register(r"T$", handle_trade_event)
-                await data_ws.subscribe(data_channels)
+                await data_ws.subscribe(data_channels[shard])
                 tlog(
-                    f"Polygon.io reconnected for {len(data_channels)} channels"
+                    f"Polygon.io shard {shard} reconnected for {len(data_channels[shard])} channels"
                 )
-                last_msg_tstamp = datetime.now()
+                last_msg_tstamp[shard] = datetime.now()
             await asyncio.sleep(config.polygon_seconds_timeout / 2)
     except asyncio.CancelledError:
         tlog("main Polygon.io consumer task cancelled ")
@@ -316,7 +331,7 @@ async def run(
 
 
 async def teardown_task(
-    tz: DstTzInfo, ws: List[StreamConn], tasks: List[asyncio.Task]
+    tz: tzinfo, ws: List[StreamConn], tasks: List[asyncio.Task]
 ) -> None:
     tlog("poylgon_producer teardown_task() starting")
     if not config.market_close:
@@ -382,20 +397,32 @@ async def producer_async_main(
 ):
     await create_db_connection(str(config.dsn))
 
-    data_ws = tradeapi.StreamConn(
-        base_url=config.prod_base_url,
-        key_id=config.prod_api_key_id,
-        secret_key=config.prod_api_secret,
-        data_stream="polygon",
-    )
-
-    main_task = asyncio.create_task(
-        run(
-            data_ws=data_ws,
-            queues=queues,
-        ),
-        name="main_task",
-    )
+    num_shards = max(1, config.polygon_ws_shards)
+    tlog(f"producer_async_main(): using {num_shards} Polygon.io web-sockets")
+    data_ws = [
+        tradeapi.StreamConn(
+            base_url=config.prod_base_url,
+            key_id=config.prod_api_key_id,
+            secret_key=config.prod_api_secret,
+            data_stream="polygon",
+        )
+        for _ in range(num_shards)
+    ]
+    data_channels[:] = [[] for _ in range(num_shards)]
+    last_msg_tstamp[:] = [datetime.now() for _ in range(num_shards)]
+
+    main_tasks = [
+        asyncio.create_task(
+            run(
+                data_ws=data_ws[shard],
+                queues=queues,
+                shard=shard,
+                shard_symbols=symbols[shard::num_shards],
+            ),
+            name=f"main_task_{shard}",
+        )
+        for shard in range(num_shards)
+    ]
 
     base_url = (
         config.prod_base_url if config.env == "PROD" else config.paper_base_url
@@ -427,14 +454,14 @@ async def producer_async_main(
     )
     tear_down = asyncio.create_task(
         teardown_task(
-            timezone("America/New_York"),
-            [data_ws, trade_ws],
-            [main_task, scanner_input_task],
+            NY,
+            [*data_ws, trade_ws],
+            [*main_tasks, scanner_input_task],
         )
     )
 
     await asyncio.gather(
-        main_task,
+        *main_tasks,
         trade_updates_task,
         scanner_input_task,
         tear_down,
@@ -482,6 +509,13 @@ def polygon_producer_main(
 
         symbols = current_symbols
         queue_id_hash = current_queue_id_hash
+
+        # websocket frames are decoded by the alpaca stream modules
+        fast_json.patch_module(stream2)
+        fast_json.patch_module(streamconn)
+
+        if uvloop:
+            uvloop.install()
         if not asyncio.get_event_loop().is_closed():
             asyncio.get_event_loop().close()
         asyncio.run(
@@ -5,10 +5,10 @@ from typing import List, Optional
 from concurrent.futures import ThreadPoolExecutor
 import alpaca_trade_api as tradeapi
 import requests
-from pytz import timezone
 
 from liualgotrader.common import config
 from liualgotrader.common.tlog import tlog
+from liualgotrader.common.tz import NY
 from liualgotrader.models.ticker_data import StockOhlc
 from liualgotrader.common.market_data import get_historical_daily_from_polygon_by_range
 
@@ -55,16 +55,16 @@ class Momentum(Scanner):
 
     async def _wait_time(self) -> None:
         if not config.bypass_market_schedule and config.market_open:
-            nyc = timezone("America/New_York")
-            since_market_open = datetime.today().astimezone(nyc) - config.market_open
+            since_market_open = datetime.today().astimezone(NY) - config.market_open
 
             if since_market_open.seconds // 60 < self.from_market_open:
                 tlog(f"market open, wait {self.from_market_open} minutes")
-                while since_market_open.seconds // 60 < self.from_market_open:
-                    await asyncio.sleep(1)
-                    since_market_open = (
-                        datetime.today().astimezone(nyc) - config.market_open
-                    )
+                to_wait = (
+                    timedelta(minutes=self.from_market_open)
+                    - since_market_open
+                )
+                if to_wait.total_seconds() > 0:
+                    await asyncio.sleep(to_wait.total_seconds())
 
         tlog(f"Scanner {self.name} ready to run")
 
@@ -84,7 +84,7 @@ class Momentum(Scanner):
                 tlog(f"loaded {len(tickers)} tickers from Polygon")
                 if not len(tickers):
                     break
-                trade_able_symbols = self._get_trade_able_symbols()
+                trade_able_symbols = set(self._get_trade_able_symbols())
 
                 unsorted = [
                     ticker
@@ -124,9 +124,8 @@ class Momentum(Scanner):
         tlog(f"{self.name}: run_finnhub(): started")
         trade_able_symbols = self._get_trade_able_symbols()
 
-        nyc = timezone("America/New_York")
-        _from = datetime.today().astimezone(nyc) - timedelta(days=1)
-        _to = datetime.now(nyc)
+        _from = datetime.today().astimezone(NY) - timedelta(days=1)
+        _to = datetime.now(NY)
         symbols = []
         try:
             with requests.Session() as s:
@@ -3,16 +3,20 @@ import importlib.util
 import json
 import multiprocessing as mp
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, tzinfo
 from typing import Dict, List
 
 import alpaca_trade_api as tradeapi
-from pytz import timezone
-from pytz.tzinfo import DstTzInfo
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None  # type: ignore
 
 from liualgotrader.common import config
 from liualgotrader.common.database import create_db_connection
 from liualgotrader.common.tlog import tlog
+from liualgotrader.common.tz import NY
 from liualgotrader.scanners.base import Scanner
 from liualgotrader.scanners.momentum import Momentum
 
@@ -155,7 +159,7 @@ async def scanners_runner(scanners_conf: Dict, queue: mp.Queue) -> None:
         tlog("scanners_runner.scanners_runner()  done.")
 
 
-async def teardown_task(tz: DstTzInfo, tasks: List[asyncio.Task]) -> None:
+async def teardown_task(tz: tzinfo, tasks: List[asyncio.Task]) -> None:
     tlog("scanners_runner.teardown_task() starting")
     dt = datetime.today().astimezone(tz)
     to_market_close: timedelta
@@ -204,7 +208,7 @@ async def async_main(scanners_conf: Dict, queue: mp.Queue) -> None:
 
     tear_down = asyncio.create_task(
         teardown_task(
-            timezone("America/New_York"),
+            NY,
             [main_task],
         )
     )
@@ -228,6 +232,8 @@ def main(
     config.market_close = market_close
     config.bypass_market_schedule = conf_dict.get("bypass_market_schedule", False)
     scanners_conf = conf_dict["scanners"]
+    if uvloop:
+        uvloop.install()
     try:
         if not asyncio.get_event_loop().is_closed():
             asyncio.get_event_loop().close()
@@ -16,6 +16,10 @@ class StrategyType(Enum):
 
 
 class Strategy:
+    # independent strategies do not depend on side-effects of other
+    # strategies, and may run() concurrently with them on the same symbol
+    independent: bool = False
+
     def __init__(
         self,
         name: str,
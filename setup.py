@@ -2,6 +2,7 @@ import codecs
 import os.path
 
 import setuptools
+from setuptools.command.build_py import build_py
 
 with open("README.md", "r") as fh:
     long_description = fh.read()
@@ -16,6 +17,41 @@ def read(rel_path):
         return fp.read()
 
 
+class build_py_with_version(build_py):
+    """build_py, baking the git describe label into the built package"""
+
+    def run(self):
+        super().run()
+
+        # written into the build directory only, so a source checkout
+        # never carries a stale label (see common/build_label.py)
+        try:
+            import pygit2
+
+            here = os.path.abspath(os.path.dirname(__file__))
+            label = pygit2.Repository(here).describe(
+                describe_strategy=pygit2.GIT_DESCRIBE_TAGS
+            )
+        except Exception:
+            return
+
+        package_dir = os.path.join(self.build_lib, "liualgotrader")
+        self.mkpath(package_dir)
+        with open(os.path.join(package_dir, "VERSION"), "w") as fp:
+            fp.write(f"{label}\n")
+
+
+def get_ext_modules():
+    # opt-in AOT compilation of the consumer quote handling, requires mypy
+    # (see requirements/dev.txt) and LIU_MYPYC=1
+    if os.getenv("LIU_MYPYC", "") not in ("1", "true"):
+        return []
+
+    from mypyc.build import mypycify
+
+    return mypycify(["liualgotrader/hot_handlers.py"])
+
+
 def get_version(rel_path):
     for line in read(rel_path).splitlines():
         if line.startswith("__version__"):
@@ -38,6 +74,8 @@ setuptools.setup(
     install_requires=requirements,
     data_files=[("liualgotrader", ["liualgotrader/requirements/release.txt"])],
     packages=setuptools.find_packages(),
+    ext_modules=get_ext_modules(),
+    cmdclass={"build_py": build_py_with_version},
     classifiers=[
         "Programming Language :: Python :: 3.8",
         #        "Programming Language :: Python :: 3.9",
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from liualgotrader.common.minute_ring import MinuteRing
+
+START = 1604327400  # 2020-11-02 09:30 NY, epoch seconds
+
+
+def minute_data(minutes: int) -> pd.DataFrame:
+    index = pd.DatetimeIndex(
+        pd.to_datetime(
+            [START + 60 * i for i in range(minutes)], unit="s", utc=True
+        ),
+        name="timestamp",
+    ).tz_convert("America/New_York")
+    values = np.arange(minutes, dtype=np.float64)
+    return pd.DataFrame(
+        {
+            "open": values + 1.0,
+            "high": values + 2.0,
+            "low": values,
+            "close": values + 1.5,
+            "volume": values * 100.0,
+            "vwap": 0.0,
+            "average": 0.0,
+        },
+        index=index,
+    )
+
+
+def test_from_dataframe_round_trip() -> None:
+    data = minute_data(5)
+    ring = MinuteRing.from_dataframe(data, spare=3)
+
+    assert len(ring) == 5
+    assert ring.ts.size == 8
+    pd.testing.assert_frame_equal(
+        ring.as_dataframe(), data, check_freq=False, check_index_type=False
+    )
+
+
+def test_update_aggregates_into_existing_minute() -> None:
+    ring = MinuteRing.from_dataframe(minute_data(2), spare=2)
+    last_minute = START + 60
+
+    ring.update(last_minute, 9.0, 5.0, 0.5, 3.0, 10.0, 2.0, 2.5)
+    ring.update(last_minute, 9.0, 2.5, 0.25, 2.75, 5.0, 2.1, 2.6)
+
+    assert len(ring) == 2
+    bar = ring.as_dataframe().iloc[-1]
+    # open is kept, high / low extended, volume added, close replaced
+    assert bar["open"] == 2.0
+    assert bar["high"] == 5.0
+    assert bar["low"] == 0.25
+    assert bar["volume"] == 100.0 + 10.0 + 5.0
+    assert bar["close"] == 2.75
+    assert bar["vwap"] == 2.1
+    assert bar["average"] == 2.6
+
+
+def test_wraparound_evicts_oldest() -> None:
+    ring = MinuteRing.from_dataframe(minute_data(3), spare=1)
+    for i in range(3, 6):
+        ring.update(START + 60 * i, i, i, i, i, i, 0.0, 0.0)
+
+    assert len(ring) == 4
+    expected = [START + 60 * i for i in range(2, 6)]
+    assert sorted(ring.idx) == expected
+    assert START not in ring.idx and START + 60 not in ring.idx
+
+    result = ring.as_dataframe()
+    assert [int(t.timestamp()) for t in result.index] == expected
+    assert list(result["close"]) == [3.5, 3.0, 4.0, 5.0]
+
+    # an evicted minute comes back as a new bar, not an aggregate
+    ring.update(START + 60 * 6, 6.0, 6.0, 6.0, 6.0, 6.0, 0.0, 0.0)
+    assert START + 60 * 2 not in ring.idx
+    assert ring.as_dataframe().index[0].timestamp() == START + 60 * 3
+
+
+def test_as_dataframe_oldest_first_and_cached_per_minute() -> None:
+    ring = MinuteRing(capacity=3)
+    for i in (0, 1, 2, 3):
+        ring.update(START + 60 * i, i, i, i, i, i, 0.0, 0.0)
+
+    first = ring.as_dataframe()
+    assert first.index.is_monotonic_increasing
+    assert first.index.name == "timestamp"
+    assert str(first.index.tz) == "America/New_York"
+    assert list(first["close"]) == [1.0, 2.0, 3.0]
+    assert ring.as_dataframe() is first
+
+    # same minute: the cached frame's last row is patched in place
+    ring.update(START + 60 * 3, 3.0, 9.0, 3.0, 7.0, 1.0, 0.0, 0.0)
+    assert ring.as_dataframe() is first
+    assert first["close"].iloc[-1] == 7.0
+    assert first["high"].iloc[-1] == 9.0
+    assert first["volume"].iloc[-1] == 4.0
+
+    # minute roll-over evicts a bar, and rebuilds
+    ring.update(START + 60 * 4, 4.0, 4.0, 4.0, 4.0, 4.0, 0.0, 0.0)
+    second = ring.as_dataframe()
+    assert second is not first
+    assert list(second["close"]) == [2.0, 7.0, 4.0]
+
+
+def test_as_dataframe_not_rebuilt_on_every_update() -> None:
+    data = minute_data(390)
+    ring = MinuteRing.from_dataframe(data)
+    cached = ring.as_dataframe()
+    last_minute = START + 60 * 389
+
+    for tick in range(100):
+        ring.update(last_minute, 1.0, 1000.0, 0.0, tick, 1.0, 0.0, 0.0)
+        assert ring.as_dataframe() is cached
+
+    assert cached["close"].iloc[-1] == 99.0
+    assert cached["volume"].iloc[-1] == 38900.0 + 100.0
+    pd.testing.assert_frame_equal(
+        cached.iloc[:-1], data.iloc[:-1], check_freq=False
+    )
+
+    # an update to an older minute invalidates the cached frame
+    ring.update(START, 1.0, 1.0, 1.0, 1.0, 1.0, 0.0, 0.0)
+    assert ring.as_dataframe() is not cached